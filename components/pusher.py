@@ -19,7 +19,8 @@ def create_pusher(
         region: GCP region where Vertex AI is running.
         container_image_uri: URI of the serving container image.
         serving_args: Dict of serving arguments (e.g. endpoint name, machine type,
-                      accelerator settings).
+                      accelerator settings, replica counts, autoscaling target and
+                      canary traffic percentage), as built by `build_vertex_serving_spec`.
 
     Returns:
         A configured Pusher component.
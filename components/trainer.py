@@ -12,6 +12,7 @@ def create_trainer(
     use_gpu: bool,
     train_steps: int = 100,
     eval_steps: int = 5,
+    runtime_profile: dict = None,
 ) -> Trainer:
     """
     Creates and returns a Vertex AI Trainer component for TFX.
@@ -26,6 +27,8 @@ def create_trainer(
       use_gpu: Whether to enable GPU training.
       train_steps: Number of training steps per epoch.
       eval_steps: Number of evaluation steps.
+      runtime_profile: Optional 'training' section of the tuned runtime profile
+                       (thread pools), applied inside `run_fn`.
 
     Returns:
       A configured `Trainer` component ready to be added to your pipeline.
@@ -36,6 +39,7 @@ def create_trainer(
         tfx.extensions.google_cloud_ai_platform.TRAINING_ARGS_KEY: vertex_job_spec,
         "epochs": epochs,
         "use_gpu": use_gpu,
+        "runtime_profile": runtime_profile or {},
     }
 
     return Trainer(
@@ -4,6 +4,12 @@ import numpy as np
 from settings import (
     GOOGLE_CLOUD_REGION,
     GOOGLE_CLOUD_PROJECT,
+    SCHEMA_URI,
+)
+from src.instance_validator import (
+    build_feature_constraints,
+    load_schema,
+    validate_instances,
 )
 
 ENDPOINT_ID = "3133393734394183680"
@@ -28,6 +34,16 @@ instances = [
     },
 ]
 
+schema = load_schema(SCHEMA_URI) if SCHEMA_URI else None
+constraints = build_feature_constraints(schema)
+instances, rejected = validate_instances(instances, constraints)
+
+for index, reasons in rejected:
+    print(f'Instância {index} rejeitada: {"; ".join(reasons)}')
+
+if not instances:
+    raise SystemExit('Nenhuma instância válida para enviar ao endpoint.')
+
 endpoint_path_str = client.endpoint_path(
     project=GOOGLE_CLOUD_PROJECT,
     location=GOOGLE_CLOUD_REGION,
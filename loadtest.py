@@ -0,0 +1,325 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from settings import RUNTIME_PROFILE_PATH
+from spec.runtime_profile import load_runtime_profile, machine_type_cores, runtime_env
+
+_PREDICT_PATH = '/v1/models/default:predict'
+
+
+def _serve(saved_model: str, port: int, profile: dict, sessions: int):
+    """
+    Runs a local stand-in for one Vertex AI replica: the exported SavedModel
+    behind a TF-Serving-style REST predict route.
+
+    Args:
+      saved_model:  Exported SavedModel directory.
+      port:         Local port to listen on.
+      profile:      'serving' section of the runtime profile (thread pools).
+      sessions:     Model calls allowed to run at once. TF Serving handles
+                    requests concurrently, so this matches the replica's vCPUs.
+    """
+    import tensorflow as tf
+    from src.insider_trainer import _apply_runtime_profile
+
+    _apply_runtime_profile(profile)
+    serve = tf.saved_model.load(saved_model).signatures['serving_default']
+    dtypes = {
+        name: spec.dtype.as_numpy_dtype
+        for name, spec in serve.structured_input_signature[1].items()
+    }
+    slots = threading.BoundedSemaphore(sessions)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.end_headers()
+
+        def do_POST(self):
+            if self.path != _PREDICT_PATH:
+                self.send_error(404)
+                return
+            body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+            instances = body['instances']
+            inputs = {
+                name: np.asarray([inst[name] for inst in instances], dtype=dtype)
+                for name, dtype in dtypes.items()
+            }
+            # At most `sessions` model calls run at once, like TF Serving on a
+            # replica with that many vCPUs; extra requests queue here.
+            with slots:
+                outputs = serve(**inputs)
+            logits = next(iter(outputs.values())).numpy().tolist()
+            payload = json.dumps({'predictions': logits}).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    ThreadingHTTPServer(('127.0.0.1', port), Handler).serve_forever()
+
+
+def _start_replica(
+    saved_model: str,
+    port: int,
+    profile_path: str,
+    profile: dict,
+    sessions: int,
+) -> subprocess.Popen:
+    """
+    Starts the stand-in server in a child process and waits until it answers.
+
+    The child reads the same profile file as the parent, so its thread pools
+    match the environment variables set here.
+    """
+    env = dict(os.environ)
+    env.update({e['name']: e['value'] for e in runtime_env(profile)})
+    env['TF_CPP_MIN_LOG_LEVEL'] = '2'
+    proc = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), '--serve',
+         '--saved-model', saved_model, '--port', str(port),
+         '--profile', os.path.abspath(profile_path), '--sessions', str(sessions)],
+        env=env,
+    )
+    for _ in range(300):
+        if proc.poll() is not None:
+            raise RuntimeError('Stand-in server exited during startup.')
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/', timeout=1)
+            return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError('Stand-in server did not start in time.')
+
+
+def load_trace(path: str) -> list:
+    """
+    Loads a request trace.
+
+    Args:
+      path:  Either a JSONL file with one {"offset": seconds, "instances": [...]}
+             request per line, or a JSON file in the instances.json format, which
+             is replayed as a single request.
+
+    Returns:
+      List of (offset_seconds, instances) tuples sorted by offset.
+    """
+    with open(path) as f:
+        if path.endswith('.jsonl'):
+            trace = [json.loads(line) for line in f if line.strip()]
+        else:
+            trace = [{'offset': 0.0, 'instances': json.load(f)['instances']}]
+    return sorted(((r['offset'], r['instances']) for r in trace), key=lambda r: r[0])
+
+
+def replay(url: str, trace: list, qps: float, duration: float, workers: int) -> dict:
+    """
+    Replays the trace open-loop at `qps` requests per second for `duration` seconds.
+
+    The trace is looped as needed; its request mix and inter-arrival pattern are
+    kept, with the gaps rescaled so the mean rate equals `qps` (a trace without
+    timing is sent at a uniform rate). Latency is measured from each request's
+    scheduled send time, so queueing in the client counts against the server
+    instead of hiding it.
+
+    Returns:
+      Dict with offered and sustained QPS, error count and latency percentiles (ms).
+    """
+    total = max(1, int(qps * duration))
+    payloads = [json.dumps({'instances': inst}).encode() for _, inst in trace]
+
+    gaps = np.diff([offset for offset, _ in trace], append=trace[-1][0]).astype(float)
+    gaps[-1] = gaps[:-1].mean() if len(gaps) > 1 else 0.0
+    if gaps.sum() > 0:
+        gaps = gaps / gaps.mean() / qps
+    else:
+        gaps = np.full(len(trace), 1 / qps)
+    schedule = np.concatenate(([0.0], np.cumsum(np.resize(gaps, total - 1))))
+
+    latencies = np.full(total, np.nan)
+    start = time.perf_counter() + 0.1
+
+    def _send(i: int):
+        scheduled = start + schedule[i]
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        req = urllib.request.Request(
+            url, data=payloads[i % len(payloads)],
+            headers={'Content-Type': 'application/json'},
+        )
+        try:
+            with urllib.request.urlopen(req, timeout=30) as resp:
+                resp.read()
+            latencies[i] = time.perf_counter() - scheduled
+        except OSError:
+            pass  # left as NaN and counted as an error below
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(_send, range(total)))
+    elapsed = time.perf_counter() - start
+
+    ok = latencies[~np.isnan(latencies)] * 1000
+    p50, p95, p99 = np.percentile(ok, [50, 95, 99]) if ok.size else (np.inf,) * 3
+    return {
+        'offered_qps': qps,
+        'sustained_qps': ok.size / elapsed,
+        'errors': total - ok.size,
+        'p50_ms': float(p50),
+        'p95_ms': float(p95),
+        'p99_ms': float(p99),
+    }
+
+
+def find_capacity(
+    url: str,
+    trace: list,
+    start_qps: float,
+    duration: float,
+    workers: int,
+    slo_p99_ms: float,
+    max_qps: float,
+    tolerance: float = 0.1,
+) -> tuple:
+    """
+    Finds the highest rate one replica sustains within the p99 SLO.
+
+    The offered rate doubles until a level errors, breaks the SLO or falls behind
+    the offered rate; the capacity is then bisected between the last passing and
+    first failing rates until they are within `tolerance` of each other. The
+    search never offers more than `max_qps`, the rate the load generator itself
+    can sustain, so the client's own limit is not reported as server capacity.
+
+    Returns:
+      (per_replica_qps, steps): the highest sustained QPS that met the SLO, and
+      the report of every rate tried.
+    """
+    steps = []
+
+    def _probe(qps: float) -> tuple:
+        report = replay(url, trace, qps, duration, workers)
+        steps.append(report)
+        print(
+            f"  offered {report['offered_qps']:8.1f} qps | sustained "
+            f"{report['sustained_qps']:8.1f} | p50 {report['p50_ms']:7.1f} ms | "
+            f"p95 {report['p95_ms']:7.1f} ms | p99 {report['p99_ms']:7.1f} ms | "
+            f"errors {report['errors']}"
+        )
+        healthy = (
+            report['errors'] == 0
+            and report['p99_ms'] <= slo_p99_ms
+            and report['sustained_qps'] >= 0.9 * qps
+        )
+        return healthy, report['sustained_qps']
+
+    capacity, passing, qps = 0.0, 0.0, min(start_qps, max_qps)
+    while True:
+        healthy, sustained = _probe(qps)
+        if not healthy:
+            failing = qps
+            break
+        capacity, passing = sustained, qps
+        if qps >= max_qps:
+            print(f'  reached --max-qps ({max_qps}); capacity is at least {capacity:.1f} qps')
+            return capacity, steps
+        qps = min(qps * 2, max_qps)
+
+    # Below 1 qps the replica is unusable anyway; stop narrowing there.
+    while failing - passing > tolerance * failing and failing >= 1.0:
+        qps = (passing + failing) / 2
+        healthy, sustained = _probe(qps)
+        if healthy:
+            capacity, passing = sustained, qps
+        else:
+            failing = qps
+
+    return capacity, steps
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Measures the sustained QPS and tail latency of one serving '
+                    'replica by replaying a request trace against a local stand-in '
+                    'server running the exported model.')
+    parser.add_argument('--saved-model', required=True, help='Exported SavedModel directory.')
+    parser.add_argument('--trace', default='instances.json',
+                        help='Request trace (.jsonl) or instances.json-style file.')
+    parser.add_argument('--start-qps', type=float, default=10.0)
+    parser.add_argument('--duration', type=float, default=10.0,
+                        help='Seconds spent at each offered rate.')
+    parser.add_argument('--max-qps', type=float, default=1000.0,
+                        help='Highest rate the load generator can offer reliably.')
+    parser.add_argument('--tolerance', type=float, default=0.1,
+                        help='Relative precision of the capacity search.')
+    parser.add_argument('--workers', type=int, default=64)
+    parser.add_argument('--slo-p99-ms', type=float, default=100.0)
+    parser.add_argument('--port', type=int, default=8501)
+    parser.add_argument('--profile', default=RUNTIME_PROFILE_PATH)
+    parser.add_argument('--sessions', type=int,
+                        help='Concurrent model calls in the stand-in server '
+                             '(default: vCPUs of the serving machine type).')
+    parser.add_argument('--serve', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    serving_profile = load_runtime_profile(args.profile)['serving']
+    sessions = args.sessions or machine_type_cores(serving_profile['machine_type'])
+
+    if args.serve:
+        _serve(args.saved_model, args.port, serving_profile, sessions)
+        return
+
+    if sessions > (os.cpu_count() or 1):
+        print(f'Warning: {sessions} sessions on a {os.cpu_count()}-core host; the '
+              f'measured capacity understates a {serving_profile["machine_type"]} replica.')
+
+    trace = load_trace(args.trace)
+    proc = _start_replica(
+        args.saved_model, args.port, args.profile, serving_profile, sessions)
+    try:
+        capacity, steps = find_capacity(
+            f'http://127.0.0.1:{args.port}{_PREDICT_PATH}', trace,
+            args.start_qps, args.duration, args.workers, args.slo_p99_ms,
+            args.max_qps, args.tolerance,
+        )
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    print(f'Per-replica capacity within p99 <= {args.slo_p99_ms} ms: {capacity:.1f} qps')
+    if not capacity:
+        print('No rate met the SLO; runtime profile left unchanged.')
+        return
+
+    profile = {}
+    if os.path.exists(args.profile):
+        with open(args.profile) as f:
+            profile = json.load(f)
+    profile.setdefault('serving', {}).update({
+        'per_replica_qps': capacity,
+        'slo_p99_ms': args.slo_p99_ms,
+        'load_test_intra_op_threads': serving_profile['intra_op_threads'],
+        'load_test_sessions': sessions,
+        'load_test': steps,
+    })
+    with open(args.profile, 'w') as f:
+        json.dump(profile, f, indent=2)
+    print(f'Runtime profile updated: {args.profile}')
+
+
+if __name__ == '__main__':
+    main()
@@ -19,10 +19,16 @@ from settings import (
     VERTEX_TENSORBOARD,
     SERVICE_ACCOUNT,
     OUTPUT_PREFIX,
-    EPOCHS
+    EPOCHS,
+    RUNTIME_PROFILE_PATH,
+    SERVING_BASELINE_QPS,
+    SERVING_PEAK_QPS,
+    SERVING_TARGET_UTILIZATION,
+    CANARY_TRAFFIC_PERCENTAGE,
 )
 
 from pipeline.pipeline import create_pipeline
+from spec.runtime_profile import load_runtime_profile
 
 script_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.dirname(script_dir)
@@ -57,6 +63,11 @@ if __name__ == '__main__':
             output_tb=OUTPUT_PREFIX,
             epochs=EPOCHS,
             use_gpu=False,
+            runtime_profile=load_runtime_profile(RUNTIME_PROFILE_PATH),
+            baseline_qps=SERVING_BASELINE_QPS,
+            peak_qps=SERVING_PEAK_QPS,
+            target_utilization=SERVING_TARGET_UTILIZATION,
+            traffic_percentage=CANARY_TRAFFIC_PERCENTAGE,
         )
     )
 
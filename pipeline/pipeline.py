@@ -6,6 +6,7 @@ project_root = os.path.dirname(script_dir)
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
+from absl import logging
 from tfx.v1.dsl import Pipeline
 import tensorflow_model_analysis as tfma
 
@@ -14,7 +15,8 @@ from components.statistics_gen import create_statistics_gen
 from components.schema_gen import create_schema
 from spec.vertex_job_spec import build_vertex_job_spec
 from components.trainer import create_trainer
-from spec.vertex_serving_spec import build_vertex_serving_spec
+from spec.vertex_serving_spec import build_vertex_serving_spec, replicas_for_qps
+from spec.runtime_profile import DEFAULT_RUNTIME_PROFILE, runtime_env
 from components.pusher import create_pusher
 from components.evaluator import create_evaluator
 
@@ -49,6 +51,11 @@ def create_pipeline(
     output_tb: str,
     epochs: int,
     use_gpu: bool,
+    runtime_profile: dict = None,
+    baseline_qps: float = None,
+    peak_qps: float = None,
+    target_utilization: int = 60,
+    traffic_percentage: int = 100,
 ) -> Pipeline:
     """
     Constructs and returns a TFX Pipeline with all core components wired up:
@@ -66,10 +73,21 @@ def create_pipeline(
       service_account:       Service account to run training and serving jobs.
       output_tb:             GCS prefix where TensorBoard logs are written.
       use_gpu:               Whether to enable GPU acceleration.
+      runtime_profile:       Tuned runtime profile (see tune.py); its 'training'
+                             and 'serving' sections set machine types, thread
+                             pools. Defaults when omitted.
+      baseline_qps:          Steady request rate; sizes the minimum replica count.
+      peak_qps:              Peak request rate; sizes the maximum replica count.
+      target_utilization:    CPU utilization (%) targeted by autoscaling.
+      traffic_percentage:    Endpoint traffic sent to the new model (canary if < 100).
 
     Returns:
       A fully configured TFX Pipeline object.
     """
+    runtime_profile = runtime_profile or DEFAULT_RUNTIME_PROFILE
+    training_profile = runtime_profile['training']
+    serving_profile = runtime_profile['serving']
+
     example_gen = create_csv_example_gen(input_base=data_root)
 
     statistics = create_statistics_gen(examples=example_gen.outputs['examples'])
@@ -81,8 +99,9 @@ def create_pipeline(
         tensorboard_uri=tensorboard_vertex,
         service_account=service_account,
         output_prefix=output_tb,
-        machine_type="n1-standard-4",
+        machine_type=training_profile['machine_type'],
         use_gpu=use_gpu,
+        env=runtime_env(training_profile),
     )
 
     trainer = create_trainer(
@@ -93,6 +112,7 @@ def create_pipeline(
         region=region,
         epochs=epochs,
         use_gpu=use_gpu,
+        runtime_profile=training_profile,
     )
 
     evaluator = create_evaluator(
@@ -101,12 +121,34 @@ def create_pipeline(
         eval_config=eval_config
     )
 
+    # Replica counts come from the per-replica capacity measured by loadtest.py;
+    # without a measurement a single replica is deployed.
+    min_replicas = max_replicas = 1
+    per_replica_qps = serving_profile.get('per_replica_qps')
+    if not per_replica_qps and (baseline_qps or peak_qps):
+        logging.warning(
+            'No per-replica capacity in the runtime profile: deploying a single '
+            'replica regardless of baseline_qps=%s / peak_qps=%s. Run loadtest.py '
+            'to size the endpoint.', baseline_qps, peak_qps)
+    if per_replica_qps:
+        if baseline_qps:
+            min_replicas = replicas_for_qps(
+                baseline_qps, per_replica_qps, target_utilization)
+        if peak_qps:
+            max_replicas = replicas_for_qps(
+                peak_qps, per_replica_qps, target_utilization)
+
     vertex_serving_spec, serving_image = build_vertex_serving_spec(
         project_id=project_id,
         endpoint_name=endpoint_name,
+        machine_type=serving_profile['machine_type'],
         use_gpu=use_gpu,
         gpu_type="NVIDIA_TESLA_K80",
-        gpu_count=1
+        gpu_count=1,
+        min_replica_count=min_replicas,
+        max_replica_count=max_replicas,
+        target_utilization=target_utilization,
+        traffic_percentage=traffic_percentage,
     )
 
     pusher = create_pusher(
@@ -26,5 +26,21 @@ DATA_ROOT = 'gs://insider-test/data/'
 
 ENDPOINT_NAME = 'prediction-' + PIPELINE_NAME
 
+# Written by tune.py; read by main.py to size machines and thread pools.
+RUNTIME_PROFILE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'runtime_profile.json')
+
+# Serving capacity planning. Replica counts are derived from these rates and the
+# per-replica QPS measured by loadtest.py. Set CANARY_TRAFFIC_PERCENTAGE below
+# 100 to roll a new model out as a canary.
+SERVING_BASELINE_QPS = 5
+SERVING_PEAK_QPS = 50
+SERVING_TARGET_UTILIZATION = 60
+CANARY_TRAFFIC_PERCENTAGE = 100
+
+# SchemaGen output used by inference.py to validate requests locally.
+# Leave empty to validate against _FEATURE_SPEC and the built-in rules only.
+SCHEMA_URI = os.environ.get('SCHEMA_URI', '')
+
 
 
@@ -0,0 +1,89 @@
+import json
+import os
+
+# Used when no tuned profile exists: TensorFlow picks its own thread pools
+# (0 = one thread per core).
+DEFAULT_RUNTIME_PROFILE = {
+    "training": {
+        "machine_type": "n1-standard-4",
+        "intra_op_threads": 0,
+        "inter_op_threads": 0,
+        "onednn": True,
+    },
+    "serving": {
+        "machine_type": "n1-standard-4",
+        "intra_op_threads": 0,
+    },
+}
+
+# n1-standard sizes, used to pick the smallest VM that still holds the best
+# thread count found by the tuner.
+N1_STANDARD_CORES = (2, 4, 8, 16, 32, 64, 96)
+
+
+def load_runtime_profile(path: str) -> dict:
+    """
+    Loads the runtime profile written by tune.py.
+
+    Args:
+      path:  Path to the profile JSON file.
+
+    Returns:
+      The profile dict, with any missing section or key filled in from
+      DEFAULT_RUNTIME_PROFILE. If the file does not exist, the defaults are returned.
+    """
+    profile = {}
+    if path and os.path.exists(path):
+        with open(path) as f:
+            profile = json.load(f)
+
+    merged = {}
+    for section in ("training", "serving"):
+        merged[section] = {
+            **DEFAULT_RUNTIME_PROFILE[section],
+            **profile.get(section, {}),
+        }
+    return merged
+
+
+def machine_type_for_threads(threads: int) -> str:
+    """
+    Returns the smallest n1-standard machine type with at least `threads` vCPUs.
+
+    Args:
+      threads:  Number of threads the workload was measured to benefit from.
+                0 (let TensorFlow decide) maps to the default machine type.
+    """
+    if threads <= 0:
+        return DEFAULT_RUNTIME_PROFILE["training"]["machine_type"]
+    for cores in N1_STANDARD_CORES:
+        if cores >= threads:
+            return f"n1-standard-{cores}"
+    return f"n1-standard-{N1_STANDARD_CORES[-1]}"
+
+
+def machine_type_cores(machine_type: str) -> int:
+    """
+    Returns the vCPU count of an "<family>-<type>-<vCPUs>" machine type
+    (e.g. 4 for "n1-standard-4").
+    """
+    return int(machine_type.rsplit("-", 1)[-1])
+
+
+def runtime_env(section: dict) -> list:
+    """
+    Builds the container environment variables for a profile section.
+
+    oneDNN and the OpenMP pool are read by TensorFlow at import time, so they
+    have to be set on the container rather than from inside run_fn.
+
+    Args:
+      section:  The 'training' or 'serving' section of a runtime profile.
+
+    Returns:
+      A list of {"name": ..., "value": ...} dicts, as used in Vertex container specs.
+    """
+    env = {"TF_ENABLE_ONEDNN_OPTS": "1" if section.get("onednn", True) else "0"}
+    if section.get("intra_op_threads"):
+        env["OMP_NUM_THREADS"] = str(section["intra_op_threads"])
+    return [{"name": k, "value": v} for k, v in env.items()]
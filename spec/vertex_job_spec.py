@@ -11,6 +11,7 @@ def build_vertex_job_spec(
     use_gpu: bool = False,
     gpu_type: str = "NVIDIA_TESLA_K80",
     gpu_count: int = 1,
+    env: list = None,
     as_json: bool = False,
 ):
     """
@@ -25,6 +26,8 @@ def build_vertex_job_spec(
       use_gpu:           If True, adds GPU accelerators to the machine spec.
       gpu_type:          Type of GPU to attach (default: "NVIDIA_TESLA_K80").
       gpu_count:         Number of GPUs to attach (default: 1).
+      env:               Optional list of {"name", "value"} environment variables
+                         for the training container (e.g. from `runtime_env`).
       as_json:           If True, returns the spec as a formatted JSON string;
                          otherwise returns a Python dict.
 
@@ -46,6 +49,9 @@ def build_vertex_job_spec(
         }],
     }
 
+    if env:
+        spec["worker_pool_specs"][0]["container_spec"]["env"] = env
+
     if use_gpu:
         spec["worker_pool_specs"][0]["machine_spec"].update({
             "accelerator_type": gpu_type,
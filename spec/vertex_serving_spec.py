@@ -1,4 +1,28 @@
 import json
+import math
+
+
+def replicas_for_qps(
+    qps: float,
+    per_replica_qps: float,
+    target_utilization: int = 60,
+) -> int:
+    """
+    Returns how many replicas are needed to serve `qps` at the target utilization.
+
+    Args:
+      qps:                 Expected request rate.
+      per_replica_qps:     Sustained QPS one replica handled within the latency
+                           SLO, as measured by loadtest.py.
+      target_utilization:  CPU utilization (%) each replica should run at, leaving
+                           the rest as headroom for bursts.
+
+    Returns:
+      The replica count (at least 1).
+    """
+    usable = per_replica_qps * target_utilization / 100
+    return max(1, math.ceil(qps / usable))
+
 
 def build_vertex_serving_spec(
     *,
@@ -8,6 +32,10 @@ def build_vertex_serving_spec(
     use_gpu: bool = False,
     gpu_type: str = "NVIDIA_TESLA_K80",
     gpu_count: int = 1,
+    min_replica_count: int = 1,
+    max_replica_count: int = 1,
+    target_utilization: int = 60,
+    traffic_percentage: int = 100,
     as_json: bool = False,
 ):
     """
@@ -21,6 +49,11 @@ def build_vertex_serving_spec(
       use_gpu:        Whether to attach GPU accelerators.
       gpu_type:       Type of GPU to attach (default: "NVIDIA_TESLA_K80").
       gpu_count:      Number of GPUs to attach (default: 1).
+      min_replica_count:   Replicas always kept running (default: 1).
+      max_replica_count:   Upper bound for autoscaling (default: 1).
+      target_utilization:  CPU utilization (%) that triggers autoscaling (default: 60).
+      traffic_percentage:  Share of endpoint traffic routed to the new model; values
+                           below 100 deploy it as a canary next to the current one.
       as_json:        If True, return the spec as a formatted JSON string; otherwise a dict.
 
     Returns:
@@ -36,6 +69,10 @@ def build_vertex_serving_spec(
         "project_id": project_id,
         "endpoint_name": endpoint_name,
         "machine_type": machine_type,
+        "min_replica_count": min_replica_count,
+        "max_replica_count": max(min_replica_count, max_replica_count),
+        "autoscaling_target_cpu_utilization": target_utilization,
+        "traffic_percentage": traffic_percentage,
     }
 
     serving_image = "us-docker.pkg.dev/vertex-ai/prediction/tf2-cpu.2-6:latest"
@@ -107,6 +107,28 @@ def _get_distribution_strategy(fn_args: tfx.components.FnArgs):
     return None
 
 
+def _apply_runtime_profile(profile: dict):
+    """
+    Configures the TensorFlow CPU thread pools from a runtime profile section.
+
+    Args:
+      profile:  The 'training' (or 'serving') section of a runtime profile, as
+                written by tune.py. 0 or a missing key keeps TensorFlow's default.
+
+    Must run before TensorFlow creates its runtime context; if the context is
+    already initialized the thread settings are left unchanged and a warning is logged.
+    """
+    try:
+        if profile.get('intra_op_threads'):
+            tf.config.threading.set_intra_op_parallelism_threads(
+                profile['intra_op_threads'])
+        if profile.get('inter_op_threads'):
+            tf.config.threading.set_inter_op_parallelism_threads(
+                profile['inter_op_threads'])
+    except RuntimeError as e:
+        logging.warning('Could not apply thread settings: %s', e)
+
+
 def run_fn(fn_args: tfx.components.FnArgs):
     """
     Entry point for TFX Trainer component. Builds, trains, and exports the model.
@@ -121,14 +143,19 @@ def run_fn(fn_args: tfx.components.FnArgs):
       fn_args.custom_config:     Dict; supports:
          - 'epochs' (int): number of training epochs.
          - 'use_gpu' (bool): whether to enable GPU strategy.
+         - 'runtime_profile' (dict): thread pools from tune.py.
 
     Behavior:
-      1. Builds train and eval Datasets via _input_fn.
-      2. Creates the model in a strategy scope if needed.
-      3. Trains for the given number of epochs/steps.
-      4. Writes the SavedModel to fn_args.serving_model_dir.
+      1. Applies the runtime profile (thread pools) before any TF op runs.
+      2. Builds train and eval Datasets via _input_fn.
+      3. Creates the model in a strategy scope if needed.
+      4. Trains for the given number of epochs/steps.
+      5. Writes the SavedModel to fn_args.serving_model_dir.
     """
     epochs = fn_args.custom_config.get('epochs', 1)
+    runtime_profile = fn_args.custom_config.get('runtime_profile', {})
+    _apply_runtime_profile(runtime_profile)
+
     schema = schema_utils.schema_from_feature_spec(_FEATURE_SPEC)
 
     train_ds = _input_fn(
@@ -0,0 +1,169 @@
+import numbers
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import tensorflow as tf
+from tensorflow_metadata.proto.v0 import schema_pb2
+from tfx import v1 as tfx
+
+from src.insider_trainer import _FEATURE_SPEC, _LABEL_KEY
+
+
+# Business rules that SchemaGen cannot infer from the statistics alone.
+# Each entry is (min, max, allowed values); None means "no constraint".
+_VALUE_CONSTRAINTS = {
+    'pclass': (None, None, (1, 2, 3)),
+    'age':    (0.0, None, None),
+    'parch':  (0.0, None, None),
+    'fare':   (0.0, None, None),
+    'sex':    (None, None, (0, 1)),
+}
+
+
+def load_schema(schema_uri: str) -> schema_pb2.Schema:
+    """
+    Loads the schema produced by SchemaGen.
+
+    Args:
+      schema_uri:  Path (local or GCS) to the SchemaGen output directory or
+                   directly to its schema.pbtxt file.
+
+    Returns:
+      The parsed schema_pb2.Schema.
+    """
+    if tf.io.gfile.isdir(schema_uri):
+        schema_uri = os.path.join(schema_uri, 'schema.pbtxt')
+    return tfx.utils.parse_pbtxt_file(schema_uri, schema_pb2.Schema())
+
+
+def build_feature_constraints(
+    schema: Optional[schema_pb2.Schema] = None,
+) -> Dict[str, dict]:
+    """
+    Builds the per-feature constraints used by validate_instances.
+
+    Starts from _FEATURE_SPEC (dtype and shape of every serving input) and
+    _VALUE_CONSTRAINTS, then tightens the bounds with the int/float domains
+    recorded in the SchemaGen schema, when one is given.
+
+    Args:
+      schema:  Optional schema_pb2.Schema produced by SchemaGen.
+
+    Returns:
+      Dict mapping feature name to a dict with keys 'dtype', 'min', 'max'
+      and 'values'.
+    """
+    constraints = {}
+    for name, spec in _FEATURE_SPEC.items():
+        if name == _LABEL_KEY:
+            continue
+        lo, hi, values = _VALUE_CONSTRAINTS.get(name, (None, None, None))
+        constraints[name] = {
+            'dtype': np.int64 if spec.dtype.is_integer else np.float64,
+            'min': lo,
+            'max': hi,
+            'values': values,
+        }
+
+    if schema is None:
+        return constraints
+
+    for feature in schema.feature:
+        if feature.name not in constraints:
+            continue
+        domain = None
+        if feature.HasField('int_domain'):
+            domain = feature.int_domain
+        elif feature.HasField('float_domain'):
+            domain = feature.float_domain
+        if domain is None:
+            continue
+        c = constraints[feature.name]
+        if domain.HasField('min'):
+            c['min'] = domain.min if c['min'] is None else max(c['min'], domain.min)
+        if domain.HasField('max'):
+            c['max'] = domain.max if c['max'] is None else min(c['max'], domain.max)
+
+    return constraints
+
+
+def _to_scalar(value) -> float:
+    """Unwraps the [x] list used in the request format into a float (NaN if invalid)."""
+    if isinstance(value, (list, tuple)):
+        if len(value) != 1:
+            return np.nan
+        value = value[0]
+    # NumPy scalars (e.g. rows taken from a DataFrame) are valid numbers; bools are not.
+    if isinstance(value, (bool, np.bool_)):
+        return np.nan
+    if not isinstance(value, (numbers.Real, np.number)):
+        return np.nan
+    return float(value)
+
+
+def validate_instances(
+    instances: List[dict],
+    constraints: Dict[str, dict],
+) -> Tuple[List[dict], List[Tuple[int, List[str]]]]:
+    """
+    Validates and encodes a batch of raw instances before sending them to the endpoint.
+
+    Each feature is gathered into a single NumPy column and checked with vectorized
+    masks, so the cost per batch is a handful of array operations per feature.
+
+    Args:
+      instances:    List of dicts, one per row, in the format of instances.json
+                    (e.g. {'age': [22.0], 'sex': [1], ...}) or with bare scalars.
+      constraints:  Output of build_feature_constraints.
+
+    Returns:
+      A tuple (valid_instances, rejected):
+        valid_instances: rows that passed, encoded as {feature: [value]} with the
+                         dtype expected by the serving signature.
+        rejected:        list of (row_index, reasons) for every row that failed.
+    """
+    n = len(instances)
+    bad = np.zeros(n, dtype=bool)
+    reasons = [[] for _ in range(n)]
+    columns = {}
+
+    def _flag(mask: np.ndarray, reason: str):
+        for i in np.flatnonzero(mask):
+            reasons[i].append(reason)
+        np.logical_or(bad, mask, out=bad)
+
+    for name, c in constraints.items():
+        present = np.fromiter((name in row for row in instances), dtype=bool, count=n)
+        col = np.fromiter(
+            (_to_scalar(row.get(name)) for row in instances), dtype=np.float64, count=n
+        )
+        _flag(~present, f"'{name}' is missing")
+
+        non_numeric = present & ~np.isfinite(col)
+        _flag(non_numeric, f"'{name}' is not a finite number")
+
+        checked = present & ~non_numeric
+        if c['dtype'] is np.int64:
+            _flag(checked & (col != np.round(col)), f"'{name}' must be an integer")
+        if c['min'] is not None:
+            _flag(checked & (col < c['min']), f"'{name}' must be >= {c['min']}")
+        if c['max'] is not None:
+            _flag(checked & (col > c['max']), f"'{name}' must be <= {c['max']}")
+        if c['values'] is not None:
+            _flag(
+                checked & ~np.isin(col, c['values']),
+                f"'{name}' must be one of {list(c['values'])}",
+            )
+        columns[name] = col
+
+    ok = ~bad
+    encoded = {
+        name: col[ok].astype(constraints[name]['dtype']).reshape(-1, 1).tolist()
+        for name, col in columns.items()
+    }
+    names = list(encoded)
+    valid_instances = [dict(zip(names, row)) for row in zip(*encoded.values())]
+    rejected = [(int(i), reasons[i]) for i in np.flatnonzero(bad)]
+
+    return valid_instances, rejected
@@ -0,0 +1,316 @@
+import argparse
+import itertools
+import json
+import os
+import subprocess
+import sys
+import time
+
+from settings import RUNTIME_PROFILE_PATH
+from spec.runtime_profile import machine_type_for_threads, runtime_env
+
+# Number of synthetic rows held in memory for each trial.
+_SYNTHETIC_ROWS = 4096
+
+# Serving keys written by loadtest.py; they stay valid only while the serving
+# thread count they were measured with does not change.
+_LOAD_TEST_KEYS = (
+    'per_replica_qps',
+    'slo_p99_ms',
+    'load_test',
+    'load_test_intra_op_threads',
+    'load_test_sessions',
+)
+
+
+def _thread_counts(cpu_count: int) -> list:
+    """Powers of two up to the number of cores, plus the core count itself."""
+    counts = {cpu_count}
+    n = 1
+    while n < cpu_count:
+        counts.add(n)
+        n *= 2
+    return sorted(counts)
+
+
+def _synthetic_features(rows: int) -> dict:
+    """
+    Builds random inputs matching the serving signature of the Trainer model.
+
+    Returns:
+      Dict mapping every feature in _FEATURE_SPEC (except the label) to a
+      [rows, 1] tensor of the right dtype.
+    """
+    import tensorflow as tf
+    from src.insider_trainer import _FEATURE_SPEC, _LABEL_KEY
+
+    features = {}
+    for name, spec in _FEATURE_SPEC.items():
+        if name == _LABEL_KEY:
+            continue
+        if spec.dtype.is_integer:
+            features[name] = tf.random.uniform(
+                [rows, 1], minval=0, maxval=2, dtype=spec.dtype)
+        else:
+            features[name] = tf.random.uniform(
+                [rows, 1], minval=0.0, maxval=100.0, dtype=spec.dtype)
+    return features
+
+
+def _run_training_trial(trial: dict, steps: int) -> dict:
+    """
+    Trains the real Keras model on synthetic data, at the Trainer's own batch
+    size, and measures throughput.
+
+    Runs inside a fresh process, so the thread pools are set before TensorFlow
+    executes any op.
+    """
+    import tensorflow as tf
+    from src.insider_trainer import (
+        _TRAIN_BATCH_SIZE,
+        _apply_runtime_profile,
+        _make_keras_model,
+    )
+
+    _apply_runtime_profile(trial)
+
+    features = _synthetic_features(_SYNTHETIC_ROWS)
+    labels = tf.random.uniform([_SYNTHETIC_ROWS, 1], maxval=2, dtype=tf.int64)
+    ds = tf.data.Dataset.from_tensor_slices((features, labels)) \
+        .batch(_TRAIN_BATCH_SIZE).repeat()
+
+    model = _make_keras_model()
+    # Warm-up epoch: graph tracing and allocation are not part of the measurement.
+    model.fit(ds, epochs=1, steps_per_epoch=5, verbose=0)
+
+    start = time.perf_counter()
+    model.fit(ds, epochs=1, steps_per_epoch=steps, verbose=0)
+    elapsed = time.perf_counter() - start
+
+    return {'examples_per_sec': steps * _TRAIN_BATCH_SIZE / elapsed}
+
+
+def _run_serving_trial(trial: dict, steps: int, saved_model: str) -> dict:
+    """
+    Calls the exported SavedModel's serving signature and measures throughput
+    and per-request latency.
+    """
+    import numpy as np
+    import tensorflow as tf
+    from src.insider_trainer import _apply_runtime_profile
+
+    _apply_runtime_profile(trial)
+
+    serve = tf.saved_model.load(saved_model).signatures['serving_default']
+    batch = {
+        name: t[:trial['batch_size']]
+        for name, t in _synthetic_features(_SYNTHETIC_ROWS).items()
+    }
+    for _ in range(5):
+        serve(**batch)
+
+    latencies = np.empty(steps)
+    start = time.perf_counter()
+    for i in range(steps):
+        t0 = time.perf_counter()
+        serve(**batch)
+        latencies[i] = time.perf_counter() - t0
+    elapsed = time.perf_counter() - start
+
+    return {
+        'examples_per_sec': steps * trial['batch_size'] / elapsed,
+        'p99_latency_ms': float(np.percentile(latencies, 99) * 1000),
+    }
+
+
+def _launch_trial(mode: str, trial: dict, steps: int, saved_model: str) -> dict:
+    """
+    Runs one trial in a child process with the trial's environment variables set.
+
+    Returns:
+      The trial dict updated with its measurements, or None if the child failed.
+    """
+    env = dict(os.environ)
+    env.update({e['name']: e['value'] for e in runtime_env(trial)})
+    env['TF_CPP_MIN_LOG_LEVEL'] = '2'
+
+    cmd = [
+        sys.executable, os.path.abspath(__file__), '--trial', json.dumps(trial),
+        '--mode', mode, '--steps', str(steps),
+    ]
+    if saved_model:
+        cmd += ['--saved-model', saved_model]
+
+    proc = subprocess.run(cmd, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        print(f'  trial failed: {trial}\n{proc.stderr.strip()[-500:]}')
+        return None
+    return {**trial, **json.loads(proc.stdout.strip().splitlines()[-1])}
+
+
+def _run_trials(mode: str, trials: list, steps: int, saved_model: str = None) -> list:
+    """Runs every trial in its own process and returns the successful results."""
+    results = []
+    for trial in trials:
+        result = _launch_trial(mode, trial, steps, saved_model)
+        if result is None:
+            continue
+        print(f'  {mode}: {result}')
+        results.append(result)
+    if not results:
+        raise RuntimeError(f'No successful {mode} trial.')
+    return results
+
+
+def sweep_training(
+    intra_op_threads: list,
+    inter_op_threads: list,
+    steps: int,
+) -> dict:
+    """
+    Sweeps thread pools and oneDNN for training.
+
+    The batch size is not tuned: with a fixed number of steps per epoch it sets
+    how many optimizer updates the model gets, so changing it for speed would
+    change what the model learns. Trials run at _TRAIN_BATCH_SIZE.
+
+    Args:
+      intra_op_threads:  Candidate intra-op thread counts.
+      inter_op_threads:  Candidate inter-op thread counts.
+      steps:             Measured training steps per trial.
+
+    Returns:
+      The 'training' profile section with the highest examples_per_sec, including
+      the smallest machine_type that holds its intra-op thread count.
+    """
+    trials = [
+        {
+            'intra_op_threads': intra,
+            'inter_op_threads': inter,
+            'onednn': onednn,
+        }
+        for intra, inter, onednn in itertools.product(
+            intra_op_threads, inter_op_threads, (True, False))
+    ]
+    results = _run_trials('training', trials, steps)
+
+    best = max(results, key=lambda r: r['examples_per_sec'])
+    best['machine_type'] = machine_type_for_threads(best['intra_op_threads'])
+    return best
+
+
+def sweep_serving(
+    intra_op_threads: list,
+    request_batch_size: int,
+    steps: int,
+    saved_model: str,
+    latency_budget_ms: float,
+) -> dict:
+    """
+    Sweeps the intra-op thread count for online serving.
+
+    Trials use the batch size clients actually send (inference.py sends one row
+    per request). The serving container only receives a machine type, so the
+    goal is the fewest cores that keep p99 latency within budget.
+
+    Args:
+      intra_op_threads:    Candidate intra-op thread counts.
+      request_batch_size:  Rows per prediction request in production.
+      steps:               Measured requests per trial.
+      saved_model:         Exported SavedModel directory.
+      latency_budget_ms:   p99 latency budget per request.
+
+    Returns:
+      The 'serving' profile section: machine_type, intra_op_threads and the
+      measurements of the chosen trial.
+    """
+    trials = [
+        {'intra_op_threads': intra, 'batch_size': request_batch_size}
+        for intra in intra_op_threads
+    ]
+    results = _run_trials('serving', trials, steps, saved_model)
+
+    within_budget = [r for r in results if r['p99_latency_ms'] <= latency_budget_ms]
+    if not within_budget:
+        raise RuntimeError(
+            f'No serving trial met the p99 budget of {latency_budget_ms} ms.')
+
+    best = min(
+        within_budget,
+        key=lambda r: (r['intra_op_threads'], -r['examples_per_sec']),
+    )
+    return {
+        'machine_type': machine_type_for_threads(best['intra_op_threads']),
+        'intra_op_threads': best['intra_op_threads'],
+        'examples_per_sec': best['examples_per_sec'],
+        'p99_latency_ms': best['p99_latency_ms'],
+    }
+
+
+def main():
+    cpu_count = os.cpu_count() or 1
+
+    parser = argparse.ArgumentParser(
+        description='Finds the best CPU threading profile on this '
+                    'machine and writes it to the runtime profile used by main.py.')
+    parser.add_argument('--mode', choices=['training', 'serving', 'both'], default='both')
+    parser.add_argument('--saved-model', help='Exported SavedModel directory (serving).')
+    parser.add_argument('--intra-op-threads', type=int, nargs='+',
+                        default=_thread_counts(cpu_count))
+    parser.add_argument('--inter-op-threads', type=int, nargs='+',
+                        default=_thread_counts(min(cpu_count, 2)))
+    parser.add_argument('--serving-batch-size', type=int, default=1,
+                        help='Rows per prediction request sent by clients.')
+    parser.add_argument('--latency-budget-ms', type=float, default=100.0)
+    parser.add_argument('--steps', type=int, default=50)
+    parser.add_argument('--output', default=RUNTIME_PROFILE_PATH)
+    parser.add_argument('--trial', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.trial:
+        trial = json.loads(args.trial)
+        if args.mode == 'training':
+            result = _run_training_trial(trial, args.steps)
+        else:
+            result = _run_serving_trial(trial, args.steps, args.saved_model)
+        print(json.dumps(result))
+        return
+
+    if args.mode in ('serving', 'both') and not args.saved_model:
+        parser.error('--saved-model is required to tune serving.')
+
+    profile = {}
+    if os.path.exists(args.output):
+        with open(args.output) as f:
+            profile = json.load(f)
+
+    profile['host_cpu_count'] = cpu_count
+
+    if args.mode in ('training', 'both'):
+        profile['training'] = sweep_training(
+            args.intra_op_threads, args.inter_op_threads, args.steps,
+        )
+    if args.mode in ('serving', 'both'):
+        previous = profile.get('serving', {})
+        serving = sweep_serving(
+            args.intra_op_threads, args.serving_batch_size, args.steps,
+            args.saved_model, args.latency_budget_ms,
+        )
+        measured_threads = previous.get(
+            'load_test_intra_op_threads', previous.get('intra_op_threads'))
+        if 'per_replica_qps' in previous:
+            if measured_threads == serving['intra_op_threads']:
+                serving.update({k: previous[k] for k in _LOAD_TEST_KEYS if k in previous})
+            else:
+                print('Serving thread count changed: per-replica capacity cleared. '
+                      'Re-run loadtest.py before deploying with autoscaling.')
+        profile['serving'] = serving
+
+    with open(args.output, 'w') as f:
+        json.dump(profile, f, indent=2)
+    print(f'Runtime profile written to {args.output}')
+    print(json.dumps(profile, indent=2))
+
+
+if __name__ == '__main__':
+    main()